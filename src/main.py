@@ -9,6 +9,8 @@ from tqdm import tqdm
 import pandas as pd
 from PIL import Image as pil
 
+from snapshot import SnapshotWriter
+
 """ CONSTANTS """
 yadisk_dir = "/mnt/c/Users/zer0nu11/Desktop/Work/Images_test"
 prod_server_dir = "/mnt/c/Users/zer0nu11/Desktop/Work/out"
@@ -347,6 +349,7 @@ if __name__ == "__main__":
     mover = Mover(prod_server_dir)
 
     reporter = Reporter(name="report", path=reports_dir)
+    snapshotWriter = SnapshotWriter(name="catalogue", path=reports_dir)
     # ========================================================================
     tmp_time = time.time()
     folders = folderSearcher.search(yadisk_dir)
@@ -375,3 +378,10 @@ if __name__ == "__main__":
     reporter.report_folders(folders)
     reporter.report_stats(files_exist, files_moved)
     reporter.save_log()
+
+    tmp_time = time.time()
+    try:
+        snapshot_file = snapshotWriter.save(folders, prod_images)
+        logging.info(f"Saving catalogue snapshot {snapshot_file} takes {(time.time()-tmp_time):.2f} sec")
+    except Exception as e:
+        logging.warning(f"Don't save catalogue snapshot. {e}")
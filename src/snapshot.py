@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import struct
+import datetime
+import argparse
+
+import numpy as np
+import pandas as pd
+
+""" CONSTANTS """
+snapshot_magic = b"CATSNAP1"
+snapshot_align = 64 # every column starts on 64-byte boundary
+
+# source column values
+SOURCE_DISK = 0
+SOURCE_PROD = 1
+
+NO_VALUE = -1 # stored instead of None in integer columns
+
+
+# ========================= FORMAT =========================
+"""
+    Файл снимка каталога:
+        magic       - 8 байт, snapshot_magic
+        header_len  - uint32 little-endian, длина JSON-заголовка
+        header      - JSON: {"created": ..., "tables": {table: {"rows": n, "columns": {name: [dtype, offset]}}}}
+        columns     - колонки фиксированной ширины, каждая выровнена на snapshot_align байт
+
+    Таблица folders - папки с я.диска (индекс строки = folder_id)
+    Таблица images  - все картинки я.диска и прода с флагами из ImageChecker/ProdChecker
+"""
+
+def _align(offset: int) -> int:
+    return (offset + snapshot_align - 1) // snapshot_align * snapshot_align
+
+def _encode(strings: list[str]) -> np.ndarray:
+    encoded = [s.encode('utf-8') for s in strings]
+    width = max([len(s) for s in encoded], default=1) or 1
+    return np.array(encoded, dtype=f'S{width}')
+
+def _parseTime(value) -> datetime.date:
+    """ datetime / date / ISO string -> datetime or date (for date-only values) """
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except ValueError:
+        return datetime.datetime.fromisoformat(str(value))
+
+def _timestamp(value) -> int:
+    value = _parseTime(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return int(value.timestamp())
+
+def _until(value) -> int:
+    """ Exclusive upper bound. Date-only value includes the whole day """
+    value = _parseTime(value)
+    if not isinstance(value, datetime.datetime):
+        return _timestamp(value + datetime.timedelta(days=1))
+    return _timestamp(value) + 1 # ctime stored in whole seconds
+
+
+# ========================== CLASSES ==========================
+class SnapshotWriter:
+    """ Write columnar snapshot of disk folders and prod images """
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def _foldersTable(self, folders: list) -> dict[str, np.ndarray]:
+        return {
+            'code': np.array([f.code if f.code is not None else NO_VALUE for f in folders], dtype='<i4'),
+            'clones': np.array([len(f.clones) for f in folders], dtype='<i4'),
+            'foldername': _encode([f.foldername for f in folders]),
+            'path': _encode([f.path for f in folders]),
+        }
+
+    def _imagesTable(self, folders: list, prod_images: list) -> dict[str, np.ndarray]:
+        rows = [(SOURCE_DISK, folder_id, image) for folder_id, folder in enumerate(folders) for image in folder.files]
+        rows += [(SOURCE_PROD, NO_VALUE, image) for image in prod_images]
+        images = [image for _, _, image in rows]
+        return {
+            'source': np.array([source for source, _, _ in rows], dtype='u1'),
+            'folder_id': np.array([folder_id for _, folder_id, _ in rows], dtype='<i4'),
+            'code': np.array([i.code for i in images], dtype='<i4'),
+            'number': np.array([i.number if i.number is not None else NO_VALUE for i in images], dtype='<i4'),
+            'ctime': np.array([_timestamp(i.ctime) for i in images], dtype='<i8'),
+            'weight': np.array([i.weight for i in images], dtype='<i8'),
+            'width': np.array([i.shape[0] for i in images], dtype='<i4'),
+            'height': np.array([i.shape[1] for i in images], dtype='<i4'),
+            'newest': np.array([i.newest for i in images], dtype='?'),
+            'onprod': np.array([i.onprod for i in images], dtype='?'),
+            'latest': np.array([i.latest for i in images], dtype='?'),
+            'moved': np.array([i.moved for i in images], dtype='?'),
+            'wrong_dir': np.array([i.wrong_dir for i in images], dtype='?'),
+            'extension': _encode([i.extension for i in images]),
+            'filename': _encode([i.filename for i in images]),
+            'path': _encode([i.path for i in images]),
+        }
+
+    def _layout(self, tables: dict) -> tuple[bytes, list[tuple[int, np.ndarray]]]:
+        """ Compute column offsets. Header length affects offsets, so repeat until it's stable """
+        header_len = 0
+        while True:
+            offset = _align(len(snapshot_magic) + 4 + header_len)
+            header = {'created': datetime.datetime.now().isoformat(timespec='seconds'), 'tables': {}}
+            columns = []
+            for table_name, table in tables.items():
+                rows = len(next(iter(table.values())))
+                header['tables'][table_name] = {'rows': rows, 'columns': {}}
+                for column_name, column in table.items():
+                    header['tables'][table_name]['columns'][column_name] = [column.dtype.str, offset]
+                    columns.append((offset, column))
+                    offset = _align(offset + column.nbytes)
+            header = json.dumps(header).encode('utf-8')
+            if len(header) == header_len:
+                return header, columns
+            header_len = len(header)
+
+    def save(self, folders: list, prod_images: list) -> str:
+        tables = {
+            'folders': self._foldersTable(folders),
+            'images': self._imagesTable(folders, prod_images),
+        }
+        header, columns = self._layout(tables)
+        filename = os.path.join(self.path, f"{self.name}.snap")
+        # пишем во временный файл, чтобы не испортить снимок, который сейчас кто-то читает
+        with open(filename + '.tmp', 'wb') as f:
+            f.write(snapshot_magic)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for offset, column in columns:
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(column.tobytes())
+        os.replace(filename + '.tmp', filename)
+        return filename
+
+class Catalogue:
+    """ Memory-mapped snapshot. Answers report questions without walking photo directories """
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._mmap = np.memmap(filename, dtype='u1', mode='r')
+        if self._mmap[:len(snapshot_magic)].tobytes() != snapshot_magic:
+            raise ValueError(f"Not a catalogue snapshot: {filename}")
+        header_start = len(snapshot_magic) + 4
+        header_len = struct.unpack('<I', self._mmap[len(snapshot_magic):header_start].tobytes())[0]
+        header = json.loads(self._mmap[header_start:header_start+header_len].tobytes())
+        self.created = datetime.datetime.fromisoformat(header['created'])
+        self.folders = self._mapTable(header['tables']['folders'])
+        self.images = self._mapTable(header['tables']['images'])
+
+    def _mapTable(self, table: dict) -> dict[str, np.ndarray]:
+        columns = {}
+        for name, (dtype, offset) in table['columns'].items():
+            dtype = np.dtype(dtype)
+            columns[name] = self._mmap[offset:offset + dtype.itemsize*table['rows']].view(dtype)
+        return columns
+
+    def _codeMask(self, codes: np.ndarray, code_from: int = None, code_to: int = None) -> np.ndarray:
+        mask = np.ones(len(codes), dtype='?')
+        if code_from is not None: mask &= codes >= code_from
+        if code_to is not None: mask &= codes <= code_to
+        return mask
+
+    def select(self, source: int = None, code_from: int = None, code_to: int = None,
+                    since: datetime.datetime = None, until: datetime.datetime = None) -> np.ndarray:
+        """
+            Indices of images filtered by source, code range (inclusive) and local ctime range.
+            since/until are inclusive, date-only until covers the whole day
+        """
+        mask = self._codeMask(self.images['code'], code_from, code_to)
+        if source is not None: mask &= self.images['source'] == source
+        if since is not None: mask &= self.images['ctime'] >= _timestamp(since)
+        if until is not None: mask &= self.images['ctime'] < _until(until)
+        return np.flatnonzero(mask)
+
+    def _folderNames(self, mask: np.ndarray) -> dict[int, list[str]]:
+        """ code -> folder names. Folders without code (NO_VALUE) are skipped """
+        names = {}
+        for idx in np.flatnonzero(mask & (self.folders['code'] != NO_VALUE)):
+            names.setdefault(int(self.folders['code'][idx]), []).append(self.folders['foldername'][idx].decode('utf-8'))
+        return names
+
+    def withoutMain(self, code_from: int = None, code_to: int = None) -> dict[int, list[str]]:
+        """ Folders without main photo (same rule as Reporter._checkImagesTypes): code -> folder names """
+        main = (self.images['source'] == SOURCE_DISK) & ~self.images['wrong_dir'] & (self.images['number'] == NO_VALUE)
+        has_main = np.zeros(len(self.folders['code']), dtype='?')
+        has_main[self.images['folder_id'][main]] = True
+        mask = ~has_main & self._codeMask(self.folders['code'], code_from, code_to)
+        return self._folderNames(mask)
+
+    def wrongDir(self, code_from: int = None, code_to: int = None) -> np.ndarray:
+        """ Indices of disk images which code differs from their folder code """
+        mask = self.images['wrong_dir'] & self._codeMask(self.images['code'], code_from, code_to)
+        return np.flatnonzero(mask)
+
+    def clones(self, code_from: int = None, code_to: int = None) -> dict[int, list[str]]:
+        """ Codes with several folders on ya.disk: code -> folder names """
+        mask = (self.folders['clones'] > 0) & self._codeMask(self.folders['code'], code_from, code_to)
+        return self._folderNames(mask)
+
+    def toFrame(self, idxs: np.ndarray) -> pd.DataFrame:
+        """ Materialize selected images rows """
+        frame = {}
+        for name, column in self.images.items():
+            values = column[idxs]
+            if values.dtype.kind == 'S':
+                values = [v.decode('utf-8') for v in values]
+            frame[name] = values
+        frame = pd.DataFrame(frame)
+        frame['number'] = frame['number'].where(frame['number'] != NO_VALUE).astype('Int64')
+        # ctime у Image - локальное время (datetime.fromtimestamp), показываем так же
+        frame['ctime'] = pd.to_datetime(frame['ctime'].map(datetime.datetime.fromtimestamp))
+        return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query catalogue snapshot written by main.py")
+    parser.add_argument("snapshot", help="path to .snap file")
+    parser.add_argument("query", choices=["images", "without-main", "wrong-dir", "clones"])
+    parser.add_argument("--source", choices=["disk", "prod"])
+    parser.add_argument("--code-from", type=int)
+    parser.add_argument("--code-to", type=int)
+    parser.add_argument("--since", help="local ISO date or datetime, e.g. 2024-01-31")
+    parser.add_argument("--until", help="local ISO date or datetime, e.g. 2024-01-31 (whole day included)")
+    args = parser.parse_args()
+
+    catalogue = Catalogue(args.snapshot)
+    if args.query == "images":
+        source = {"disk": SOURCE_DISK, "prod": SOURCE_PROD, None: None}[args.source]
+        idxs = catalogue.select(source, args.code_from, args.code_to, args.since, args.until)
+        catalogue.toFrame(idxs).to_csv(sys.stdout, index=False)
+    elif args.query == "wrong-dir":
+        idxs = catalogue.wrongDir(args.code_from, args.code_to)
+        catalogue.toFrame(idxs)[['filename', 'path']].to_csv(sys.stdout, index=False)
+    else:
+        query = catalogue.withoutMain if args.query == "without-main" else catalogue.clones
+        for code, foldernames in query(args.code_from, args.code_to).items():
+            print('{:05}'.format(code), *foldernames, sep='\t')
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from main import Image, Folder
+from snapshot import SnapshotWriter, Catalogue, SOURCE_DISK, SOURCE_PROD
+
+
+@pytest.fixture
+def moscow_tz(monkeypatch):
+    # ctime у Image - наивное локальное время, проверяем в поясе не UTC
+    monkeypatch.setenv('TZ', 'Europe/Moscow')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def makeImage(filename: str, code: int, number: int, ctime: datetime.datetime, path: str, wrong_dir=False) -> Image:
+    image = Image(filename=filename, code=code, number=number, extension='jpg',
+                    ctime=ctime, weight=1000, path=path, shape=(1300, 900))
+    image.wrong_dir = wrong_dir
+    return image
+
+def makeFolder(foldername: str, code: int, path: str, files: list[Image]) -> Folder:
+    return Folder(foldername=foldername, code=code, path=path, files=files)
+
+@pytest.fixture
+def catalogue(tmp_path, moscow_tz):
+    noon = datetime.datetime(2024, 1, 31, 12, 0)
+    main = makeFolder('12345 Стол', 12345, '/disk/12345 Стол', [
+        makeImage('12345.jpg', 12345, None, noon, '/disk/12345 Стол'),
+        makeImage('54321_1.jpg', 54321, 1, noon, '/disk/12345 Стол', wrong_dir=True),
+    ])
+    clone = makeFolder('12345 копия', 12345, '/disk/12345 копия', [
+        makeImage('12345_2.jpg', 12345, 2, datetime.datetime(2024, 2, 1, 9, 0), '/disk/12345 копия'),
+    ])
+    main.clones, clone.clones = [clone], [main]
+    empty = makeFolder('22222', 22222, '/disk/22222', [])
+    nocode = makeFolder('без кода', None, '/disk/без кода', [])
+    prod = [makeImage('12345.jpg', 12345, None, datetime.datetime(2023, 12, 1), '/prod')]
+
+    filename = SnapshotWriter(name='catalogue', path=tmp_path).save([main, clone, empty, nocode], prod)
+    return Catalogue(filename)
+
+
+def test_folder_queries(catalogue):
+    assert catalogue.withoutMain() == {12345: ['12345 копия'], 22222: ['22222']}
+    assert catalogue.withoutMain(code_from=20000) == {22222: ['22222']}
+    assert catalogue.clones() == {12345: ['12345 Стол', '12345 копия']}
+
+def test_wrong_dir(catalogue):
+    frame = catalogue.toFrame(catalogue.wrongDir())
+    assert frame['filename'].tolist() == ['54321_1.jpg']
+    assert frame['path'].tolist() == ['/disk/12345 Стол']
+
+def test_select(catalogue):
+    assert catalogue.select(source=SOURCE_PROD).tolist() == [3]
+    assert catalogue.select(source=SOURCE_DISK, code_from=20000).tolist() == [1]
+    assert catalogue.select(since='2024-01-31', until='2024-01-31').tolist() == [0, 1]
+    assert catalogue.select(until=datetime.date(2024, 1, 31)).tolist() == [0, 1, 3]
+    assert catalogue.select(since='2024-01-31T12:00', until='2024-01-31T12:00').tolist() == [0, 1]
+    assert catalogue.select(until='2024-01-31T11:59:59').tolist() == [3]
+
+def test_to_frame(catalogue):
+    frame = catalogue.toFrame(catalogue.select(source=SOURCE_DISK))
+    assert frame['number'].tolist()[1:] == [1, 2]
+    assert frame['number'].isna().tolist() == [True, False, False]
+    assert frame['ctime'][0] == datetime.datetime(2024, 1, 31, 12, 0)
+
+def test_empty_snapshot(tmp_path):
+    catalogue = Catalogue(SnapshotWriter(name='catalogue', path=tmp_path).save([], []))
+    assert catalogue.withoutMain() == {}
+    assert catalogue.clones() == {}
+    assert catalogue.wrongDir().tolist() == []
+    assert catalogue.select().tolist() == []
+    assert catalogue.toFrame(catalogue.select()).empty